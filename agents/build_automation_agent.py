@@ -3,29 +3,34 @@ import re
 import subprocess
 import time
 import matplotlib.pyplot as plt
+from log_archive import LogArchive
 
-# Function to parse build logs
-def parse_build_logs(log_file):
-    errors = []
+# Build history window and plaintext log cap (full history lives in the log archive)
+BUILD_HISTORY_DAYS = 30
+MAX_LOG_LINES = 500
+ERROR_PATTERN = r"ERROR|Error"
+
+# Function to load build errors and durations from the segmented log archive
+def load_build_history(archive, build_start, history_days=BUILD_HISTORY_DAYS):
+    """Errors logged since ``build_start`` and durations from the last ``history_days`` days."""
+    errors = [line for _, line in archive.query("build", since=build_start, pattern=ERROR_PATTERN)]
     durations = []
+    since = build_start - history_days * 24 * 60 * 60
+    for _, line in archive.query("build", since=since, pattern=r"completed in [\d.]+ seconds"):
+        match = re.search(r"completed in ([\d.]+) seconds", line)
+        durations.append(float(match.group(1)))
+    return errors, durations
 
+# Function to keep the plaintext build log bounded (only the most recent lines are kept)
+def trim_log_file(log_file, max_lines=MAX_LOG_LINES):
     try:
         with open(log_file, "r") as file:
-            for line in file:
-                # Extract errors
-                if "ERROR" in line:
-                    errors.append(line.strip())
-
-                # Extract build durations dynamically
-                match = re.search(r"completed in ([\d.]+) seconds", line)
-                if match:
-                    durations.append(float(match.group(1)))  # Store actual duration
-
+            lines = file.readlines()
     except FileNotFoundError:
-        print(f"⚠ Error: Log file not found at {log_file}")
-        sys.exit(1)
-
-    return errors, durations
+        return
+    if len(lines) > max_lines:
+        with open(log_file, "w") as file:
+            file.writelines(lines[-max_lines:])
 
 # Function to analyze build durations
 def analyze_build_durations(durations):
@@ -92,12 +97,21 @@ if __name__ == "__main__":
     build_duration = round(end_time - start_time, 2)  # Correctly calculates build time
     actual_duration = end_time - start_time  # Convert to seconds
 
-    # Append the real build duration to logs
+    # Record the build in the segmented archive, which is the source for the analysis below
+    archive = LogArchive()
+    build_output = (result.stdout or "") + (result.stderr or "")
+    error_lines = [line for line in build_output.splitlines() if re.search(ERROR_PATTERN, line)]
+    if error_lines:
+        archive.append_lines("build", error_lines)
+    archive.append("build", f"Build completed in {actual_duration:.3f} seconds")  # Use 3 decimal places
+
+    # Keep the plaintext log for quick inspection, capped to the most recent builds
     with open(log_file, "a") as log:
-        log.write(f"Build completed in {actual_duration:.3f} seconds\n")  # Use 3 decimal places
+        log.write(f"Build completed in {actual_duration:.3f} seconds\n")
+    trim_log_file(log_file)
 
-    # Parse and analyze logs
-    errors, durations = parse_build_logs(log_file)
+    # Analyze this build's errors and recent durations from the archive
+    errors, durations = load_build_history(archive, start_time)
 
     # Print errors (Fail pipeline only if errors exist)
     if errors:
@@ -1,3 +1,5 @@
+import os
+import sys
 import subprocess
 import time
 import re
@@ -7,6 +9,9 @@ from sklearn.ensemble import IsolationForest
 # Failure history storage
 failure_history = []
 
+# Revision-based rollback tool (resolved from this file so it works from any working directory)
+REVISION_TOOL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "revision_history.py")
+
 # Function to scan container image for vulnerabilities
 def scan_container_image(image_name):
     print(f"\n🔍 Scanning container image: {image_name} for vulnerabilities...")
@@ -50,11 +55,19 @@ def analyze_failures():
     clf.fit(np.array(failure_history).reshape(-1, 1))
     return clf.predict([[failure_history[-1]]])[0] == -1  # Return True if anomaly detected
 
-# Function to perform rollback
+# Function to perform rollback (in-place revert to the previous known-good revision)
 def rollback():
     print("🚨 Rolling back deployment...")
-    subprocess.run(["bash", "../scripts/rollback.sh"])
+    result = subprocess.run([sys.executable, REVISION_TOOL, "rollback", "--fallback-undo"])
+    if result.returncode != 0:
+        print("❌ Rollback failed. Deployment may still be running the bad revision.")
+        return False
     print("✅ Rollback completed. Deployment reverted.")
+    return True
+
+# Function to record the healthy deployment as a known-good revision for future rollbacks
+def record_known_good():
+    subprocess.run([sys.executable, REVISION_TOOL, "record"])
 
 if __name__ == "__main__":
     print("\n=== AI-Powered Deployment Agent Running ===")
@@ -92,4 +105,7 @@ if __name__ == "__main__":
             rollback()
             break
 
+    if failure_count == 0:
+        record_known_good()  # Only a clean monitoring window counts as known-good
+
     print("✅ Deployment Monitoring Complete.")
@@ -0,0 +1,276 @@
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import bisect
+import argparse
+
+# Default archive location (relative to the repo root, like the other pipeline logs)
+ARCHIVE_ROOT = "logs/archive"
+MAX_SEGMENT_BYTES = 1024 * 1024  # Roll the active segment once it reaches 1 MiB
+MAX_SEGMENT_AGE = 24 * 60 * 60  # ...or once it is a day old
+BLOCK_LINES = 256  # Lines per gzip member / sparse index entry
+MAX_SEGMENTS = 60  # Closed segments kept per stream before the oldest are dropped
+
+
+class LogArchive:
+    """Segmented, gzip-compressed log storage with a sparse timestamp index.
+
+    Each stream (e.g. "build", "test") lives in its own directory holding one
+    plaintext active segment, any number of closed ``.log.gz`` segments and an
+    ``index.json``. Closed segments are written as a series of independent gzip
+    members of ``block_lines`` lines each, and the index records the first
+    timestamp and compressed offset of every member, so a time-range query only
+    decompresses the blocks it actually needs.
+    """
+
+    def __init__(self, root=ARCHIVE_ROOT, max_segment_bytes=MAX_SEGMENT_BYTES,
+                 max_segment_age=MAX_SEGMENT_AGE, block_lines=BLOCK_LINES,
+                 max_segments=MAX_SEGMENTS):
+        self.root = root
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.block_lines = block_lines
+        self.max_segments = max_segments
+
+    # --- paths & index -------------------------------------------------------
+
+    def _stream_dir(self, stream):
+        if not re.match(r"^[A-Za-z0-9_.-]+$", stream):
+            raise ValueError(f"Invalid log stream name: {stream!r}")
+        return os.path.join(self.root, stream)
+
+    def _active_path(self, stream):
+        return os.path.join(self._stream_dir(stream), "active.log")
+
+    def _index_path(self, stream):
+        return os.path.join(self._stream_dir(stream), "index.json")
+
+    def _load_index(self, stream):
+        try:
+            with open(self._index_path(stream), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"segments": [], "active": None}
+
+    def _save_index(self, stream, index):
+        path = self._index_path(stream)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, path)  # Atomic so readers never see a half-written index
+
+    # --- writing -------------------------------------------------------------
+
+    def append(self, stream, message, ts=None):
+        """Append a single (possibly multi-line) message to ``stream``."""
+        self.append_lines(stream, [message], ts=ts)
+
+    def append_lines(self, stream, lines, ts=None):
+        """Append ``lines`` to the active segment of ``stream``, rolling first if it is full or stale."""
+        os.makedirs(self._stream_dir(stream), exist_ok=True)
+        ts = time.time() if ts is None else float(ts)
+        # Every stored line must carry its own timestamp prefix, so split embedded newlines
+        lines = [part for line in lines for part in (line.splitlines() or [""])]
+        index = self._load_index(stream)
+        active = index["active"]
+
+        if active is not None and self._should_roll(stream, active, ts):
+            self._roll(stream, index)
+            active = None
+
+        mode = "ab"
+        if active is None:
+            # Keep timestamps monotonic across rolls, not just within one segment
+            ts = max(ts, index.get("last_end", ts))
+            active = {"start": ts, "end": ts, "lines": 0, "blocks": []}
+            index["active"] = active
+            mode = "wb"  # Drop any leftover active.log whose lines were already archived
+
+        ts = max(ts, active["end"])  # Keep timestamps monotonic so the index stays sorted
+        path = self._active_path(stream)
+        with open(path, mode) as f:
+            for line in lines:
+                if active["lines"] % self.block_lines == 0:
+                    active["blocks"].append([ts, f.tell()])
+                f.write(f"{ts:.3f}\t{line}\n".encode("utf-8"))
+                active["lines"] += 1
+        active["end"] = ts
+        self._save_index(stream, index)
+
+    def _should_roll(self, stream, active, now):
+        try:
+            size = os.path.getsize(self._active_path(stream))
+        except FileNotFoundError:
+            return False
+        return size >= self.max_segment_bytes or now - active["start"] >= self.max_segment_age
+
+    def roll(self, stream):
+        """Close the active segment of ``stream`` (if any) and compress it."""
+        index = self._load_index(stream)
+        if index["active"] is not None:
+            self._roll(stream, index)
+
+    def _roll(self, stream, index):
+        """Compress the active segment and save ``index`` before deleting anything.
+
+        The segment is written under a temporary name and renamed into place,
+        and the index that records it is saved before ``active.log`` and any
+        segments dropped by retention are removed, so a crash at any point
+        leaves an index that only references files which still exist.
+        """
+        active = index["active"]
+        src = self._active_path(stream)
+        seq = index.get("next_segment", 1)
+        name = f"seg-{seq:06d}.log.gz"  # Sequence number, so same-millisecond segments never collide
+        dst = os.path.join(self._stream_dir(stream), name)
+
+        blocks = []
+        with open(src, "rb") as fin, open(dst + ".tmp", "wb") as fout:
+            batch = []
+            for raw in fin:
+                batch.append(raw)
+                if len(batch) == self.block_lines:
+                    blocks.append(self._write_block(fout, batch))
+                    batch = []
+            if batch:
+                blocks.append(self._write_block(fout, batch))
+        os.replace(dst + ".tmp", dst)
+
+        index["segments"].append({
+            "file": name,
+            "start": active["start"],
+            "end": active["end"],
+            "lines": active["lines"],
+            "blocks": blocks,
+        })
+        index["next_segment"] = seq + 1
+        index["last_end"] = active["end"]
+        index["active"] = None
+        dropped = self._enforce_retention(index)
+        self._save_index(stream, index)
+
+        os.remove(src)
+        for seg in dropped:
+            try:
+                os.remove(os.path.join(self._stream_dir(stream), seg["file"]))
+            except FileNotFoundError:
+                pass
+
+    def _write_block(self, fout, batch):
+        offset = fout.tell()
+        first_ts = float(batch[0].split(b"\t", 1)[0])
+        fout.write(gzip.compress(b"".join(batch)))  # Independent gzip member per block
+        return [first_ts, offset]
+
+    def _enforce_retention(self, index):
+        """Drop the oldest segments beyond ``max_segments`` from ``index`` and return them."""
+        excess = len(index["segments"]) - self.max_segments
+        if excess <= 0:
+            return []
+        dropped = index["segments"][:excess]
+        index["segments"] = index["segments"][excess:]
+        return dropped
+
+    # --- reading -------------------------------------------------------------
+
+    def segments(self, stream):
+        """Return index metadata for the closed segments of ``stream``."""
+        return list(self._load_index(stream)["segments"])
+
+    def query(self, stream, since=None, until=None, pattern=None):
+        """Return ``(timestamp, line)`` pairs in ``[since, until]``, optionally filtered by a regex."""
+        since = float("-inf") if since is None else since
+        until = float("inf") if until is None else until
+        regex = re.compile(pattern) if pattern else None
+        index = self._load_index(stream)
+        results = []
+
+        for seg in index["segments"]:
+            if seg["end"] < since or seg["start"] > until:
+                continue  # Segment entirely outside the range; never opened
+            path = os.path.join(self._stream_dir(stream), seg["file"])
+            offset = self._seek_offset(seg["blocks"], since)
+            with open(path, "rb") as f:
+                f.seek(offset)
+                with gzip.GzipFile(fileobj=f, mode="rb") as gz:
+                    if self._collect(gz, since, until, regex, results):
+                        return results
+
+        active = index["active"]
+        if active is not None and active["end"] >= since and active["start"] <= until:
+            with open(self._active_path(stream), "rb") as f:
+                f.seek(self._seek_offset(active["blocks"], since))
+                self._collect(f, since, until, regex, results)
+
+        return results
+
+    def _seek_offset(self, blocks, since):
+        # Start from the last block whose first timestamp is <= since
+        starts = [b[0] for b in blocks]
+        i = bisect.bisect_right(starts, since) - 1
+        return blocks[max(i, 0)][1] if blocks else 0
+
+    def _collect(self, fileobj, since, until, regex, results):
+        """Read lines into ``results``; return True once past ``until``."""
+        for raw in fileobj:
+            ts_str, _, line = raw.decode("utf-8", errors="replace").rstrip("\n").partition("\t")
+            try:
+                ts = float(ts_str)
+            except ValueError:
+                continue  # Not written by append_lines (e.g. a hand-edited segment); skip it
+            if ts < since:
+                continue
+            if ts > until:
+                return True
+            if regex is None or regex.search(line):
+                results.append((ts, line))
+        return False
+
+
+def parse_since(value, now=None):
+    """Convert "7d", "12h", "30m" or "45s" into an absolute epoch timestamp."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value.strip())
+    if not match:
+        raise ValueError(f"Invalid duration: {value!r} (expected e.g. 7d, 12h, 30m)")
+    seconds = float(match.group(1)) * {"s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+    return (time.time() if now is None else now) - seconds
+
+
+# Main script logic
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query or feed the segmented pipeline log archive.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    q = sub.add_parser("query", help="Print archived lines for a stream")
+    q.add_argument("stream")
+    q.add_argument("--since", help="Relative window, e.g. 7d, 12h, 30m")
+    q.add_argument("--grep", help="Only print lines matching this regex")
+
+    ing = sub.add_parser("ingest", help="Append an existing plaintext log file to a stream")
+    ing.add_argument("stream")
+    ing.add_argument("log_file")
+
+    r = sub.add_parser("roll", help="Close and compress the active segment of a stream")
+    r.add_argument("stream")
+
+    args = parser.parse_args()
+    archive = LogArchive()
+
+    if args.command == "query":
+        since = parse_since(args.since) if args.since else None
+        for ts, line in archive.query(args.stream, since=since, pattern=args.grep):
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))}  {line}")
+    elif args.command == "ingest":
+        try:
+            with open(args.log_file, "r", encoding="utf-8", errors="replace") as f:
+                archive.append_lines(args.stream, [line.rstrip("\n") for line in f])
+        except FileNotFoundError:
+            print(f"⚠ Error: Log file not found at {args.log_file}")
+            sys.exit(1)
+        print(f"📦 Archived {args.log_file} into stream '{args.stream}'")
+    elif args.command == "roll":
+        archive.roll(args.stream)
+        print(f"📦 Rolled active segment for stream '{args.stream}'")
@@ -3,6 +3,7 @@ import time
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.ensemble import IsolationForest
+from log_archive import LogArchive
 
 # Function to collect system metrics
 def collect_metrics():
@@ -36,6 +37,7 @@ if __name__ == "__main__":
     print("\n=== AI-Powered Monitoring Agent Running ===")
     cpu_history = []
     memory_history = []
+    archive = LogArchive()  # Keep every sample queryable by time (logs/archive/monitoring)
 
     for _ in range(10):  # Monitor for 10 seconds (reduced from 30 for pipeline speed)
         metrics = collect_metrics()
@@ -43,12 +45,14 @@ if __name__ == "__main__":
         memory_history.append(metrics["memory"])
 
         print(f"CPU: {metrics['cpu']}% | Memory: {metrics['memory']}% | Disk: {metrics['disk']}%")
+        archive.append("monitoring", f"CPU: {metrics['cpu']}% | Memory: {metrics['memory']}% | Disk: {metrics['disk']}%")
 
         # Convert lists to NumPy array for anomaly detection
         if len(cpu_history) > 5:
             metric_data = np.array([cpu_history[-5:], memory_history[-5:]]).T  # Last 5 data points
             if detect_anomalies(metric_data):
                 print("⚠ Warning: Anomaly detected in system metrics! Investigate immediately.")
+                archive.append("monitoring", "WARNING: Anomaly detected in system metrics")
         
         time.sleep(1)
 
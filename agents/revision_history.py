@@ -0,0 +1,396 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from log_archive import LogArchive
+
+# Configuration Constants
+REVISION_DIR = "logs/revisions"  # Local index of known-good revisions
+KEEP_REVISIONS = 5  # Number of known-good revisions to keep
+DEPLOYMENT_NAME = "devops-pipeline"  # Matches metadata.name in webapp1/deployment.yaml
+APP_LABEL = "devops-pipeline"
+MANIFEST_FILE = "webapp1/deployment.yaml"
+READY_TIMEOUT = 120  # Seconds to wait for the reverted revision to become ready
+
+
+# Function to pin the container image of a manifest to a specific reference (e.g. repo@sha256:...)
+def pin_image(manifest_text, image):
+    return re.sub(r"(?m)^(\s*image:\s*)\S+", lambda m: m.group(1) + image, manifest_text, count=1)
+
+
+# Function to read the container image reference from a manifest
+def manifest_image(manifest_text):
+    match = re.search(r"(?m)^\s*image:\s*(\S+)", manifest_text)
+    return match.group(1) if match else None
+
+
+class RevisionHistory:
+    """Keeps the last ``keep`` known-good revisions (manifest plus image digest) on disk."""
+
+    def __init__(self, root=REVISION_DIR, keep=KEEP_REVISIONS):
+        self.root = root
+        self.keep = keep
+
+    def _index_path(self):
+        return os.path.join(self.root, "index.json")
+
+    def revisions(self):
+        """Return recorded revisions, oldest first."""
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                return json.load(f)["revisions"]
+        except FileNotFoundError:
+            return []
+
+    def _save(self, revisions):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"revisions": revisions}, f, indent=2)
+        os.replace(tmp, self._index_path())
+
+    def manifest(self, revision):
+        with open(os.path.join(self.root, revision["manifest"]), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def record(self, manifest_text, image, image_id=None, on_prune=None):
+        """Record a known-good revision; re-recording the latest one is a no-op.
+
+        ``image`` must be a reference that identifies this build (digest or
+        per-revision tag); ``image_id`` is the local image ID when known.
+        ``on_prune(revision)`` is called for each revision dropped past ``keep``
+        whose image is no longer referenced by a kept revision.
+        """
+        pinned = pin_image(manifest_text, image)
+        revisions = self.revisions()
+        if revisions and revisions[-1]["image"] == image and self.manifest(revisions[-1]) == pinned:
+            return revisions[-1]
+
+        number = revisions[-1]["revision"] + 1 if revisions else 1
+        os.makedirs(self.root, exist_ok=True)
+        name = f"rev-{number}.yaml"
+        with open(os.path.join(self.root, name), "w", encoding="utf-8") as f:
+            f.write(pinned)
+
+        revision = {"revision": number, "image": image, "image_id": image_id,
+                    "manifest": name, "recorded_at": time.time()}
+        revisions.append(revision)
+        kept, pruned = revisions[-self.keep:], revisions[:-self.keep]
+        self._save(kept)
+        kept_images = {r["image"] for r in kept}
+        for old in pruned:
+            try:
+                os.remove(os.path.join(self.root, old["manifest"]))
+            except FileNotFoundError:
+                pass
+            if on_prune is not None and old["image"] not in kept_images:
+                on_prune(old)
+        return revision
+
+    def latest(self):
+        """Newest known-good revision, or None if nothing has been recorded."""
+        revisions = self.revisions()
+        return revisions[-1] if revisions else None
+
+
+class KubectlCluster:
+    """Talks to the real cluster through kubectl."""
+
+    def __init__(self, deployment=DEPLOYMENT_NAME, app_label=APP_LABEL):
+        self.deployment = deployment
+        self.app_label = app_label
+
+    def _kubectl(self, args, input_text=None, timeout=None):
+        result = subprocess.run(["kubectl"] + args, input=input_text, capture_output=True,
+                                text=True, timeout=timeout)
+        return (result.stdout or "").strip(), result.returncode
+
+    def apply(self, manifest_text):
+        # `kubectl apply` on the Deployment triggers a rolling update; the Service is never touched
+        out, code = self._kubectl(["apply", "-f", "-"], input_text=manifest_text)
+        if code != 0:
+            raise RuntimeError(f"kubectl apply failed: {out}")
+
+    def wait_ready(self, timeout=READY_TIMEOUT):
+        _, code = self._kubectl(["rollout", "status", f"deployment/{self.deployment}",
+                                 f"--timeout={int(timeout)}s"], timeout=timeout + 10)
+        return code == 0
+
+    def undo(self):
+        """Fall back to the Deployment's own rollout history (previous ReplicaSet)."""
+        out, code = self._kubectl(["rollout", "undo", f"deployment/{self.deployment}"])
+        if code != 0:
+            raise RuntimeError(f"kubectl rollout undo failed: {out}")
+
+    def current_image(self):
+        # The Deployment spec is authoritative; pods can lag behind during a (failed) rollout
+        out, code = self._kubectl(["get", "deployment", self.deployment, "-o",
+                                   "jsonpath={.spec.template.spec.containers[0].image}"])
+        return out if code == 0 and out else None
+
+    def _docker(self, args):
+        try:
+            result = subprocess.run(["docker"] + args, capture_output=True, text=True)
+        except FileNotFoundError:
+            return "", 1
+        return (result.stdout or "").strip(), result.returncode
+
+    def image_id(self, image):
+        """Local image ID (sha256:...) that ``image`` currently resolves to, if docker knows it."""
+        out, code = self._docker(["image", "inspect", "--format", "{{.Id}}", image])
+        return out if code == 0 and out else None
+
+    def pin_revision(self, image):
+        """Return ``(reference, image_id)`` that will keep pointing at this exact build.
+
+        Locally built images (``imagePullPolicy: Never``) have no registry digest
+        and ``:latest`` is reused by every build, so the image is re-tagged with
+        its image ID (e.g. ``flask-webapp1:rev-0123abcd4567``).
+        """
+        image_id = self.image_id(image)
+        if "@sha256:" in image or image_id is None:
+            return image, image_id
+        repo = image.rsplit(":", 1)[0] if ":" in image.rsplit("/", 1)[-1] else image
+        pinned = f"{repo}:rev-{image_id.split(':')[-1][:12]}"
+        _, code = self._docker(["tag", image, pinned])
+        return (pinned if code == 0 else image), image_id
+
+    def release_revision(self, revision):
+        """Remove the per-revision tag of a pruned revision so docker can reclaim the image."""
+        if ":rev-" in revision["image"]:
+            self._docker(["rmi", revision["image"]])  # Untags only; images still tagged elsewhere stay
+
+
+class FakeCluster:
+    """Local stand-in for a cluster with a virtual clock, used to measure rollback strategies.
+
+    ``apply`` performs a surge rolling update (old pods serve until new ones are
+    ready), ``delete`` removes the Deployment and Service, and ``downtime``
+    reports how long nothing was serving traffic in a time window.
+    """
+
+    def __init__(self, replicas=2, startup_seconds=10.0, teardown_seconds=3.0, api_latency=0.3):
+        self.replicas = replicas
+        self.startup_seconds = startup_seconds
+        self.teardown_seconds = teardown_seconds
+        self.api_latency = api_latency
+        self.now = 0.0
+        self.pods = []  # {"image", "ready_at", "deleted_at"}
+        self.service_events = [(0.0, False)]
+        self.image = None
+        self.previous_image = None
+        self.rollout_done_at = 0.0
+        self.released = []
+
+    def _service_up(self, t):
+        up = False
+        for when, state in self.service_events:
+            if when <= t:
+                up = state
+        return up
+
+    def apply(self, manifest_text):
+        self.now += self.api_latency
+        if not self._service_up(self.now):
+            self.service_events.append((self.now, True))
+        image = manifest_image(manifest_text)
+        if image == self.image:
+            return
+        ready_at = self.now + self.startup_seconds
+        for pod in self.pods:
+            pod["deleted_at"] = min(pod["deleted_at"], ready_at)
+        self.pods += [{"image": image, "ready_at": ready_at, "deleted_at": float("inf")}
+                      for _ in range(self.replicas)]
+        self.previous_image = self.image
+        self.image = image
+        self.rollout_done_at = ready_at
+
+    def delete(self):
+        self.now += self.api_latency
+        self.service_events.append((self.now, False))
+        for pod in self.pods:
+            pod["deleted_at"] = min(pod["deleted_at"], self.now)
+        self.image = None
+        self.now += self.teardown_seconds  # kubectl delete waits for pods to terminate
+
+    def undo(self):
+        if self.previous_image is None:
+            raise RuntimeError("no previous rollout to undo")
+        self.apply(f"image: {self.previous_image}\n")
+
+    def wait_ready(self, timeout=READY_TIMEOUT):
+        if self.rollout_done_at - self.now > timeout:
+            self.now += timeout
+            return False
+        self.now = max(self.now, self.rollout_done_at)
+        return True
+
+    def current_image(self):
+        return self.image
+
+    def image_id(self, image):
+        return image
+
+    def pin_revision(self, image):
+        return image, image
+
+    def release_revision(self, revision):
+        self.released.append(revision["image"])
+
+    def serving(self, t):
+        return self._service_up(t) and any(p["ready_at"] <= t < p["deleted_at"] for p in self.pods)
+
+    def downtime(self, start, end):
+        points = {start, end}
+        points.update(t for t, _ in self.service_events)
+        for pod in self.pods:
+            points.update((pod["ready_at"], pod["deleted_at"]))
+        points = sorted(t for t in points if start <= t <= end)
+        return sum(b - a for a, b in zip(points, points[1:]) if not self.serving((a + b) / 2))
+
+
+# Function to record the running deployment as a known-good revision
+def record_current(history, cluster, manifest_file=MANIFEST_FILE):
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        manifest_text = f.read()
+    image = cluster.current_image() or manifest_image(manifest_text)
+    pinned, image_id = cluster.pin_revision(image)
+    revision = history.record(manifest_text, pinned, image_id, on_prune=cluster.release_revision)
+    print(f"📌 Recorded known-good revision {revision['revision']} ({revision['image']})")
+    return revision
+
+
+# Function to check whether the Deployment already runs the given revision
+def is_running(cluster, revision):
+    running = cluster.current_image()
+    if running is None:
+        return False
+    if running == revision["image"]:
+        return True
+    return revision.get("image_id") is not None and cluster.image_id(running) == revision["image_id"]
+
+
+# Function to revert in place to the newest known-good revision
+def revert(history, cluster, timeout=READY_TIMEOUT):
+    target = history.latest()
+    if target is None:
+        print("⚠ No known-good revision recorded; nothing to roll back to.")
+        return False
+    if is_running(cluster, target):
+        print(f"✅ Already running known-good revision {target['revision']} ({target['image']}); nothing to revert.")
+        return True
+
+    print(f"⏪ Reverting {cluster.current_image()} -> revision {target['revision']} ({target['image']})...")
+    cluster.apply(history.manifest(target))
+    if not cluster.wait_ready(timeout):
+        print(f"❌ Revision {target['revision']} did not become ready within {timeout}s.")
+        return False
+    print(f"✅ Revision {target['revision']} is ready and serving.")
+    return True
+
+
+# Function to roll back, optionally falling back to `kubectl rollout undo` if the revert fails
+def rollback(history, cluster, fallback_undo=False, timeout=READY_TIMEOUT):
+    try:
+        if revert(history, cluster, timeout):
+            return True
+    except FileNotFoundError as e:
+        print(f"⚠️ {e.filename} not found — cannot manage deployment revisions.")
+        return False
+    except (RuntimeError, subprocess.TimeoutExpired) as e:
+        print(f"❌ Revision rollback failed: {e}")
+
+    if not fallback_undo:
+        return False
+    print("⚠ Falling back to kubectl rollout undo...")
+    try:
+        cluster.undo()
+        if cluster.wait_ready(timeout):
+            print("✅ Previous rollout restored and ready.")
+            return True
+        print(f"❌ Previous rollout did not become ready within {timeout}s.")
+    except (RuntimeError, subprocess.TimeoutExpired) as e:
+        print(f"❌ Rollout undo failed: {e}")
+    return False
+
+
+# Function for the legacy strategy (scripts/rollback.sh before revisions): tear down and cold redeploy
+def delete_and_redeploy(manifest_text, cluster, timeout=READY_TIMEOUT):
+    cluster.delete()
+    cluster.apply(manifest_text)
+    return cluster.wait_ready(timeout)
+
+
+def run_benchmark(replicas=2, startup_seconds=10.0, teardown_seconds=3.0):
+    """Compare time-to-recovery and downtime of both rollback strategies on a FakeCluster."""
+    manifest = "spec:\n  containers:\n  - name: app\n    image: app:placeholder\n"
+    good = pin_image(manifest, "app@sha256:good")
+    bad = pin_image(manifest, "app@sha256:bad")
+    print(f"\n📊 Rollback benchmark ({replicas} replicas, {startup_seconds}s pod startup, "
+          f"{teardown_seconds}s teardown, fake cluster)")
+
+    results = {}
+    for label in ("delete-and-redeploy", "in-place revert"):
+        cluster = FakeCluster(replicas, startup_seconds, teardown_seconds)
+        with tempfile.TemporaryDirectory() as tmp:
+            history = RevisionHistory(root=tmp)
+            cluster.apply(good)
+            cluster.wait_ready()
+            history.record(good, *cluster.pin_revision(cluster.current_image()))
+            cluster.apply(bad)  # New release rolls out, then turns out to be bad
+            cluster.wait_ready()
+
+            start = cluster.now
+            if label == "in-place revert":
+                ok = revert(history, cluster)
+            else:
+                ok = delete_and_redeploy(history.manifest(history.latest()), cluster)
+            end = cluster.now
+
+        results[label] = {"recovered": ok, "ttr": end - start, "downtime": cluster.downtime(start, end)}
+        print(f"📌 {label:<20} time-to-recovery={end - start:.1f}s  downtime={results[label]['downtime']:.1f}s")
+    return results
+
+
+# Main script logic
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Revision-based, in-place deployment rollback.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("record", help="Record the running deployment as a known-good revision")
+    rb = sub.add_parser("rollback", help="Revert in place to the newest known-good revision")
+    rb.add_argument("--fallback-undo", action="store_true",
+                    help="If the revert fails, fall back to `kubectl rollout undo`")
+    sub.add_parser("list", help="List recorded known-good revisions")
+    b = sub.add_parser("bench", help="Measure rollback strategies against a fake cluster")
+    b.add_argument("--replicas", type=int, default=2)
+    b.add_argument("--startup-seconds", type=float, default=10.0)
+    b.add_argument("--teardown-seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    history = RevisionHistory()
+
+    if args.command == "list":
+        for rev in history.revisions():
+            recorded = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(rev["recorded_at"]))
+            print(f"{rev['revision']:>4}  {recorded}  {rev['image']}")
+    elif args.command == "bench":
+        run_benchmark(args.replicas, args.startup_seconds, args.teardown_seconds)
+    else:
+        ok = False
+        if args.command == "record":
+            try:
+                record_current(history, KubectlCluster())
+                ok = True
+            except FileNotFoundError as e:
+                print(f"⚠️ {e.filename} not found — cannot manage deployment revisions.")
+            except (RuntimeError, subprocess.TimeoutExpired) as e:
+                print(f"❌ Record failed: {e}")
+        else:
+            ok = rollback(history, KubectlCluster(), fallback_undo=args.fallback_undo)
+            LogArchive().append("deployment", f"Rollback {'completed' if ok else 'FAILED'}")
+        if not ok:
+            sys.exit(1)
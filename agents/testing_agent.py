@@ -1,6 +1,7 @@
 import subprocess
 import re
 import sys
+from log_archive import LogArchive
 
 # Log file path
 TEST_LOG_FILE = "logs/test_logs.txt"
@@ -19,6 +20,9 @@ def run_tests():
         with open(TEST_LOG_FILE, "w") as log:
             log.write(output)
 
+        # The log file above only holds the latest run; keep every run in the archive
+        LogArchive().append("test", output)
+
         return output
     except FileNotFoundError:
         print("🚨 Pytest is not installed or not found. Run: pip install pytest")
@@ -9,12 +9,22 @@ from sklearn.linear_model import LinearRegression
 # Ensure subprocesses print UTF-8 on Windows and other platforms
 ENV = os.environ.copy()
 ENV.setdefault("PYTHONIOENCODING", "utf-8")
+ENV.setdefault("PYTHON", sys.executable)  # Interpreter used by scripts/rollback.sh
 
 # Configuration Constants
 TEST_THRESHOLD = 1  # If failures exceed this, rollback is triggered
 MAX_RETRIES = 2  # Maximum test retries
 AUTO_SCALE_INTERVAL = 60  # Auto-scaling check interval in seconds
 
+# File Paths
+REQUIREMENTS_FILE = os.path.join(os.path.dirname(__file__), "requirements.txt")
+BUILD_LOG = "logs/build_logs.txt"
+TEST_LOG = "logs/test_logs.txt"
+MONITORING_LOG = "logs/monitoring_logs.txt"
+DEPLOYMENT_SCRIPT = "real_project/webapp/deploy.sh"
+ROLLBACK_SCRIPT = "scripts/rollback.sh"
+CONTAINER_IMAGE = "flask-webapp1:latest"
+
 # Function to scan Docker images for vulnerabilities
 def scan_container_image(image_name):
     """Use Trivy to scan the container image for vulnerabilities before deployment."""
@@ -202,25 +212,16 @@ def run_deployment_agent(deployment_script, rollback_script, tests_passed, conta
 def run_pipeline():
     print("\n🚀 Starting DevOps Pipeline with AI-Powered Auto-Scaling...")
 
-    # File Paths
-    requirements_file = os.path.join(os.path.dirname(__file__), "requirements.txt")
-    build_log = "logs/build_logs.txt"
-    test_log = "logs/test_logs.txt"
-    monitoring_log = "logs/monitoring_logs.txt"
-    deployment_script = "real_project/webapp/deploy.sh"
-    rollback_script = "scripts/rollback.sh"
-    container_image = "flask-webapp1:latest"
-
     # Execute pipeline stages
-    run_planning_agent(requirements_file)
-    run_build_agent(build_log)
+    run_planning_agent(REQUIREMENTS_FILE)
+    run_build_agent(BUILD_LOG)
 
     # Run tests & check for failures
-    tests_passed = run_testing_agent(test_log)
+    tests_passed = run_testing_agent(TEST_LOG)
 
-    run_monitoring_agent(monitoring_log)
-    scan_container_image(container_image) # Ensure security check happens before deployment
-    run_deployment_agent(deployment_script, rollback_script, tests_passed, container_image)
+    run_monitoring_agent(MONITORING_LOG)
+    scan_container_image(CONTAINER_IMAGE) # Ensure security check happens before deployment
+    run_deployment_agent(DEPLOYMENT_SCRIPT, ROLLBACK_SCRIPT, tests_passed, CONTAINER_IMAGE)
 
     print("\n✅ AI-Powered DevOps Pipeline Completed Successfully!")
 
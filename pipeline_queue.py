@@ -0,0 +1,366 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl  # POSIX only; on Windows locks are process-local
+except ImportError:
+    fcntl = None
+
+# Configuration Constants
+QUEUE_DIR = "logs/queue"  # Spool directory that `submit` writes to and the daemon drains
+LOCK_DIR = "logs/locks"  # One lock file per shared resource (cluster, scanner, log files)
+POLL_INTERVAL = 1.0  # Seconds between spool directory scans
+DEFAULT_WORKERS = 2  # Pipelines for different services that may run side by side
+
+
+class RunCancelled(Exception):
+    """Raised at a stage boundary when a newer commit has superseded the run."""
+
+
+class RunRequest:
+    """A request to run the pipeline for ``service`` at ``commit``."""
+
+    def __init__(self, service, commit, submitted_at=None):
+        self.service = service
+        self.commit = commit
+        self.submitted_at = time.time() if submitted_at is None else submitted_at
+        self.cancel_event = threading.Event()
+        self.status = "queued"
+
+    def __repr__(self):
+        return f"RunRequest({self.service!r}, {self.commit!r}, status={self.status!r})"
+
+
+class Stage:
+    """A pipeline stage: ``func(request, context)`` run while holding ``resources``."""
+
+    def __init__(self, name, func, resources=()):
+        self.name = name
+        self.func = func
+        self.resources = tuple(resources)
+
+
+class ResourceLocks:
+    """Per-resource locks shared by all workers (and, on POSIX, all processes)."""
+
+    def __init__(self, lock_dir=LOCK_DIR):
+        self.lock_dir = lock_dir
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, resource):
+        with self._guard:
+            return self._locks.setdefault(resource, threading.Lock())
+
+    @contextmanager
+    def hold(self, *resources):
+        # Always acquire in sorted order so two stages can never deadlock each other
+        ordered = sorted(set(resources))
+        acquired = []
+        files = []
+        try:
+            for resource in ordered:
+                lock = self._lock_for(resource)
+                lock.acquire()
+                acquired.append(lock)
+                if fcntl is not None and self.lock_dir:
+                    os.makedirs(self.lock_dir, exist_ok=True)
+                    f = open(os.path.join(self.lock_dir, f"{resource}.lock"), "w")
+                    files.append(f)
+                    fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+        finally:
+            for f in reversed(files):
+                fcntl.flock(f, fcntl.LOCK_UN)
+                f.close()
+            for lock in reversed(acquired):
+                lock.release()
+
+
+class PipelineQueue:
+    """Queue of pipeline runs that coalesces redundant runs per service.
+
+    With ``coalesce=True`` at most one run per service is queued and at most one
+    is in flight: a newer commit replaces the queued one, and cancels the
+    in-flight one at its next stage boundary. With ``coalesce=False`` every
+    request runs to completion, which mimics standalone pipeline invocations.
+    """
+
+    def __init__(self, stages, workers=DEFAULT_WORKERS, locks=None, coalesce=True):
+        self.stages = list(stages)
+        self.workers = workers
+        self.locks = locks if locks is not None else ResourceLocks()
+        self.coalesce = coalesce
+        self.stats = {"submitted": 0, "coalesced": 0, "cancelled": 0,
+                      "completed": 0, "failed": 0, "stages_run": 0}
+        self._pending = []
+        self._in_flight = {}  # service -> running request (used for cancellation)
+        self._running = 0
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopping = False
+
+    def submit(self, service, commit):
+        """Queue a run, replacing any queued run for the same service."""
+        request = RunRequest(service, commit)
+        with self._cond:
+            self.stats["submitted"] += 1
+            if self.coalesce:
+                for i, queued in enumerate(self._pending):
+                    if queued.service == service:
+                        queued.status = "coalesced"
+                        self._pending[i] = request  # Keep the original queue position
+                        self.stats["coalesced"] += 1
+                        break
+                else:
+                    self._pending.append(request)
+                running = self._in_flight.get(service)
+                if running is not None:
+                    running.cancel_event.set()
+            else:
+                self._pending.append(request)
+            self._cond.notify_all()
+        return request
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"pipeline-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def wait_idle(self, timeout=None):
+        """Block until nothing is queued or running; return False on timeout."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._pending or self._running:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _next_request(self):
+        for i, request in enumerate(self._pending):
+            if not self.coalesce or request.service not in self._in_flight:
+                return self._pending.pop(i)
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                request = self._next_request()
+                while request is None and not self._stopping:
+                    self._cond.wait()
+                    request = self._next_request()
+                if request is None:
+                    return
+                request.status = "running"
+                self._running += 1
+                if self.coalesce:
+                    self._in_flight[request.service] = request
+
+            self._run(request)
+
+            with self._cond:
+                self._running -= 1
+                if self._in_flight.get(request.service) is request:
+                    del self._in_flight[request.service]
+                self.stats[request.status] += 1
+                self._cond.notify_all()
+
+    def _run(self, request):
+        context = {}
+        try:
+            for stage in self.stages:
+                if request.cancel_event.is_set():
+                    raise RunCancelled(stage.name)
+                with self.locks.hold(*stage.resources):
+                    # Re-check: the run may have been superseded while waiting for a contended lock
+                    if request.cancel_event.is_set():
+                        raise RunCancelled(stage.name)
+                    stage.func(request, context)
+                with self._cond:
+                    self.stats["stages_run"] += 1
+            request.status = "completed"
+            print(f"✅ Pipeline for {request.service}@{request.commit} completed.")
+        except RunCancelled as e:
+            request.status = "cancelled"
+            print(f"⏭ Pipeline for {request.service}@{request.commit} superseded; cancelled before '{e}'.")
+        except (Exception, SystemExit) as e:
+            # Stage helpers in devops_pipeline.py call sys.exit(1) on failure
+            request.status = "failed"
+            print(f"🚨 Pipeline for {request.service}@{request.commit} failed: {e!r}")
+
+
+# Function to build the real pipeline stages from devops_pipeline.py.
+# The stages build whatever is in the working tree: the commit is only the
+# coalescing key that decides which queued request is the newest.
+def pipeline_stages():
+    import devops_pipeline as dp
+
+    def deploy(request, context):
+        dp.run_deployment_agent(dp.DEPLOYMENT_SCRIPT, dp.ROLLBACK_SCRIPT,
+                                context.get("tests_passed", False), dp.CONTAINER_IMAGE)
+
+    def test(request, context):
+        context["tests_passed"] = dp.run_testing_agent(dp.TEST_LOG)
+
+    return [
+        Stage("planning", lambda request, context: dp.run_planning_agent(dp.REQUIREMENTS_FILE)),
+        Stage("build", lambda request, context: dp.run_build_agent(dp.BUILD_LOG), ["build-logs"]),
+        Stage("test", test, ["test-logs"]),
+        Stage("monitoring", lambda request, context: dp.run_monitoring_agent(dp.MONITORING_LOG), ["monitoring-logs"]),
+        Stage("deploy", deploy, ["scanner", "cluster"]),
+    ]
+
+
+# Function to hand a run request to the daemon through the spool directory
+def submit_request(service, commit, queue_dir=QUEUE_DIR):
+    os.makedirs(queue_dir, exist_ok=True)
+    name = f"{time.time_ns()}-{os.getpid()}.json"
+    tmp = os.path.join(queue_dir, name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"service": service, "commit": commit}, f)
+    os.replace(tmp, os.path.join(queue_dir, name))  # Daemon only picks up complete files
+    return name
+
+
+# Function to move spooled requests into the in-memory queue
+def drain_spool(queue, queue_dir=QUEUE_DIR):
+    if not os.path.isdir(queue_dir):
+        return 0
+    drained = 0
+    for name in sorted(n for n in os.listdir(queue_dir) if n.endswith(".json")):
+        path = os.path.join(queue_dir, name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+            queue.submit(data["service"], data["commit"])
+            drained += 1
+        except (ValueError, KeyError, TypeError, OSError) as e:
+            print(f"⚠ Skipping malformed run request {name}: {e}")
+        try:
+            os.remove(path)  # Always drop the file so a bad request cannot wedge the daemon
+        except OSError:
+            pass
+    return drained
+
+
+def run_daemon(queue_dir=QUEUE_DIR, workers=DEFAULT_WORKERS):
+    print(f"\n🚀 Pipeline queue daemon watching {queue_dir} with {workers} worker(s)...")
+    queue = PipelineQueue(pipeline_stages(), workers=workers)
+    queue.start()
+    try:
+        while True:
+            drain_spool(queue, queue_dir)
+            time.sleep(POLL_INTERVAL)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping pipeline queue daemon...")
+        queue.stop()
+
+
+# Replay benchmark: bursty pushes against sleep-based stand-in stages
+def load_trace(trace_file):
+    """Read a JSON-lines trace of ``{"t": seconds, "service": ..., "commit": ...}`` pushes."""
+    with open(trace_file, "r", encoding="utf-8") as f:
+        return sorted((json.loads(line) for line in f if line.strip()), key=lambda e: e["t"])
+
+
+def synthetic_trace(services=3, pushes_per_service=5, burst_window=1.0):
+    trace = []
+    for s in range(services):
+        for p in range(pushes_per_service):
+            trace.append({"t": burst_window * p / pushes_per_service + 0.01 * s,
+                          "service": f"service-{s}", "commit": f"c{p}"})
+    return sorted(trace, key=lambda e: e["t"])
+
+
+def fake_stages(stage_seconds=0.2):
+    def sleeper(request, context):
+        time.sleep(stage_seconds)
+    return [
+        Stage("build", sleeper, ["build-logs"]),
+        Stage("test", sleeper, ["test-logs"]),
+        Stage("scan", sleeper, ["scanner"]),
+        Stage("deploy", sleeper, ["cluster"]),
+    ]
+
+
+def replay(trace, coalesce, workers=DEFAULT_WORKERS, stage_seconds=0.2):
+    """Replay ``trace`` against a queue and return its stats plus timings."""
+    queue = PipelineQueue(fake_stages(stage_seconds), workers=workers,
+                          locks=ResourceLocks(lock_dir=None), coalesce=coalesce)
+    queue.start()
+    start = time.time()
+    for event in trace:
+        delay = start + event["t"] - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        queue.submit(event["service"], event["commit"])
+    queue.wait_idle()
+    elapsed = time.time() - start
+    queue.stop()
+
+    result = dict(queue.stats)
+    result["wall_seconds"] = elapsed
+    result["pushes_per_second"] = len(trace) / elapsed if elapsed else 0.0
+    return result
+
+
+def run_benchmark(trace, workers=DEFAULT_WORKERS, stage_seconds=0.2):
+    print(f"\n📊 Replaying {len(trace)} pushes ({workers} workers, {stage_seconds}s per stage)")
+    for label, coalesce in (("standalone", False), ("coalescing", True)):
+        r = replay(trace, coalesce, workers=workers, stage_seconds=stage_seconds)
+        print(f"📌 {label:<10} wall={r['wall_seconds']:.2f}s  throughput={r['pushes_per_second']:.2f} pushes/s  "
+              f"stages={r['stages_run']}  completed={r['completed']}  "
+              f"coalesced={r['coalesced']}  cancelled={r['cancelled']}")
+
+
+# Main script logic
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local pipeline run queue with coalescing of redundant runs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    s = sub.add_parser("submit", help="Queue a pipeline run for a service/commit")
+    s.add_argument("service")
+    s.add_argument("commit")
+
+    d = sub.add_parser("daemon", help="Run queued pipelines")
+    d.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+
+    b = sub.add_parser("bench", help="Replay bursty pushes: standalone runs vs. coalescing queue")
+    b.add_argument("--trace", help="JSON-lines file of {t, service, commit} pushes")
+    b.add_argument("--services", type=int, default=3)
+    b.add_argument("--pushes", type=int, default=5, help="Pushes per service in the synthetic burst")
+    b.add_argument("--window", type=float, default=1.0, help="Seconds the synthetic burst is spread over")
+    b.add_argument("--stage-seconds", type=float, default=0.2)
+    b.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+
+    args = parser.parse_args()
+
+    if args.command == "submit":
+        submit_request(args.service, args.commit)
+        print(f"📥 Queued pipeline run for {args.service}@{args.commit}")
+    elif args.command == "daemon":
+        run_daemon(workers=args.workers)
+    elif args.command == "bench":
+        trace = load_trace(args.trace) if args.trace else synthetic_trace(args.services, args.pushes, args.window)
+        if not trace:
+            print("⚠ Error: Empty trace.")
+            sys.exit(1)
+        run_benchmark(trace, workers=args.workers, stage_seconds=args.stage_seconds)
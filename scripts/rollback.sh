@@ -1,4 +1,9 @@
 echo "Rolling back application..."
-kubectl delete -f webapp1/deployment.yaml
-kubectl delete -f webapp1/service.yaml
-echo "Rollback completed!"
+# Revert in place to the newest known-good revision, falling back to `kubectl rollout undo`.
+# PYTHON is set by devops_pipeline.py to its own interpreter (sys.executable).
+if "${PYTHON:-python3}" "$(dirname "$0")/../agents/revision_history.py" rollback --fallback-undo; then
+    echo "Rollback completed!"
+else
+    echo "Rollback FAILED!"
+    exit 1
+fi
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+
+import devops_pipeline
+
+
+def test_stage_helpers_pass_their_arguments_to_the_agents(monkeypatch):
+    calls = []
+
+    def fake_run_subproc(command, timeout=None):
+        calls.append(command)
+        return "ok", "", 0
+
+    monkeypatch.setattr(devops_pipeline, "run_subproc", fake_run_subproc)
+
+    devops_pipeline.run_planning_agent(devops_pipeline.REQUIREMENTS_FILE)
+    assert devops_pipeline.run_build_agent(devops_pipeline.BUILD_LOG) is True
+    devops_pipeline.run_monitoring_agent(devops_pipeline.MONITORING_LOG)
+
+    assert [c[1:] for c in calls] == [
+        ["agents/analyze_requirements.py", devops_pipeline.REQUIREMENTS_FILE],
+        ["agents/build_automation_agent.py", devops_pipeline.BUILD_LOG],
+        ["agents/monitoring_alerting_agent.py", devops_pipeline.MONITORING_LOG],
+    ]
+
+
+def test_failed_tests_run_the_rollback_script(monkeypatch):
+    ran = []
+    monkeypatch.setattr(devops_pipeline.subprocess, "run", lambda cmd, **kwargs: ran.append(cmd))
+
+    with pytest.raises(SystemExit):
+        devops_pipeline.run_deployment_agent(devops_pipeline.DEPLOYMENT_SCRIPT, devops_pipeline.ROLLBACK_SCRIPT,
+                                             False, devops_pipeline.CONTAINER_IMAGE)
+    assert ran == [["bash", devops_pipeline.ROLLBACK_SCRIPT]]
+
+
+def test_queue_runs_real_planning_stage(monkeypatch):
+    from pipeline_queue import PipelineQueue, ResourceLocks, pipeline_stages
+
+    monkeypatch.setattr(devops_pipeline, "run_subproc", lambda command, timeout=None: ("ok", "", 0))
+    queue = PipelineQueue(pipeline_stages()[:2], workers=1, locks=ResourceLocks(lock_dir=None))
+    queue.start()
+    request = queue.submit("web", "c1")
+    assert queue.wait_idle(timeout=5)
+    queue.stop()
+
+    assert request.status == "completed"
@@ -0,0 +1,77 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "agents"))
+
+from log_archive import LogArchive, parse_since
+
+
+def test_rolls_compresses_and_queries_by_time(tmp_path):
+    archive = LogArchive(root=str(tmp_path), max_segment_bytes=10**9, max_segment_age=100, block_lines=4)
+    for day in range(10):
+        for i in range(10):
+            archive.append("build", f"day {day} line {i}" + (" ERROR" if i == 3 else ""), ts=day * 100 + i)
+
+    segments = archive.segments("build")
+    assert len(segments) == 9  # One closed segment per "day"; the last one is still active
+    assert all(seg["file"].endswith(".log.gz") for seg in segments)
+    assert len(segments[0]["blocks"]) == 3  # 10 lines in blocks of 4
+
+    hits = archive.query("build", since=700, pattern="ERROR")
+    assert [line for _, line in hits] == ["day 7 line 3 ERROR", "day 8 line 3 ERROR", "day 9 line 3 ERROR"]
+
+    window = archive.query("build", since=205, until=302)
+    assert [ts for ts, _ in window] == [205, 206, 207, 208, 209, 300, 301, 302]
+
+
+def test_retention_bounds_segment_count(tmp_path):
+    archive = LogArchive(root=str(tmp_path), max_segment_bytes=1, max_segments=3)
+    for i in range(10):
+        archive.append("test", f"run {i}", ts=i)
+
+    assert len(archive.segments("test")) == 3
+    assert len(os.listdir(tmp_path / "test")) == 5  # 3 segments + active + index
+    assert [line for _, line in archive.query("test")] == ["run 6", "run 7", "run 8", "run 9"]
+
+
+def test_parse_since():
+    assert parse_since("7d", now=10 * 86400) == 3 * 86400
+    assert parse_since("30m", now=3600) == 1800
+
+
+def test_embedded_newlines_are_stored_as_separate_timestamped_lines(tmp_path):
+    archive = LogArchive(root=str(tmp_path))
+    archive.append_lines("build", ["ok", "multi\nline"], ts=5)
+
+    assert archive.query("build") == [(5, "ok"), (5, "multi"), (5, "line")]
+    with open(tmp_path / "build" / "active.log", "ab") as f:
+        f.write(b"not a timestamped line\n")
+    assert len(archive.query("build")) == 3
+
+
+def test_segments_rolled_in_the_same_millisecond_do_not_collide(tmp_path):
+    archive = LogArchive(root=str(tmp_path), max_segment_bytes=1)
+    for i in range(4):
+        archive.append("build", f"line {i}", ts=5)
+
+    assert [line for _, line in archive.query("build")] == ["line 0", "line 1", "line 2", "line 3"]
+    assert len({seg["file"] for seg in archive.segments("build")}) == 3
+
+
+def test_timestamps_stay_monotonic_across_rolls(tmp_path):
+    archive = LogArchive(root=str(tmp_path), max_segment_bytes=1)
+    archive.append("build", "late", ts=10)
+    archive.append("build", "clock went backwards", ts=4)
+
+    assert [ts for ts, _ in archive.query("build")] == [10, 10]
+
+
+def test_leftover_active_log_after_a_crashed_roll_is_discarded(tmp_path):
+    archive = LogArchive(root=str(tmp_path))
+    archive.append("build", "archived", ts=1)
+    archive.roll("build")
+    # Simulate a crash after the index was saved but before active.log was removed
+    (tmp_path / "build" / "active.log").write_bytes(b"1.000\tarchived\n")
+
+    archive.append("build", "fresh", ts=2)
+    assert [line for _, line in archive.query("build")] == ["archived", "fresh"]
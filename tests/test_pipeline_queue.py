@@ -0,0 +1,114 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pipeline_queue import PipelineQueue, ResourceLocks, Stage, drain_spool
+
+
+def test_coalesces_queued_runs_and_cancels_superseded_in_flight_run():
+    started = threading.Event()
+    release = threading.Event()
+    ran = []
+
+    def first(request, context):
+        started.set()
+        release.wait(5)
+
+    def second(request, context):
+        ran.append(request.commit)
+
+    queue = PipelineQueue([Stage("build", first), Stage("deploy", second, ["cluster"])],
+                          workers=2, locks=ResourceLocks(lock_dir=None))
+    queue.start()
+    in_flight = queue.submit("web", "c1")
+    assert started.wait(5)
+
+    queued = [queue.submit("web", commit) for commit in ("c2", "c3", "c4")]
+    release.set()
+    assert queue.wait_idle(timeout=5)
+    queue.stop()
+
+    assert in_flight.status == "cancelled"  # Stopped at the build -> deploy boundary
+    assert [r.status for r in queued] == ["coalesced", "coalesced", "completed"]
+    assert ran == ["c4"]
+    assert queue.stats["coalesced"] == 2 and queue.stats["cancelled"] == 1
+
+
+def test_resource_locks_serialize_stages_across_services():
+    active = []
+    overlaps = []
+    guard = threading.Lock()
+
+    def deploy(request, context):
+        with guard:
+            active.append(request.service)
+            if len(active) > 1:
+                overlaps.append(tuple(active))
+        threading.Event().wait(0.05)
+        with guard:
+            active.remove(request.service)
+
+    queue = PipelineQueue([Stage("deploy", deploy, ["cluster"])], workers=3,
+                          locks=ResourceLocks(lock_dir=None))
+    queue.start()
+    for service in ("a", "b", "c"):
+        queue.submit(service, "c1")
+    assert queue.wait_idle(timeout=5)
+    queue.stop()
+
+    assert queue.stats["completed"] == 3
+    assert overlaps == []
+
+
+def test_failing_stage_marks_run_failed():
+    def boom(request, context):
+        sys.exit(1)
+
+    queue = PipelineQueue([Stage("build", boom)], workers=1, locks=ResourceLocks(lock_dir=None))
+    queue.start()
+    request = queue.submit("web", "c1")
+    assert queue.wait_idle(timeout=5)
+    queue.stop()
+
+    assert request.status == "failed"
+
+
+def test_run_superseded_while_waiting_for_lock_does_not_deploy():
+    holding = threading.Event()
+    release = threading.Event()
+    deployed = []
+
+    def deploy(request, context):
+        if request.service == "b":
+            holding.set()
+            release.wait(5)
+        deployed.append(f"{request.service}@{request.commit}")
+
+    locks = ResourceLocks(lock_dir=None)
+    queue = PipelineQueue([Stage("deploy", deploy, ["cluster"])], workers=2, locks=locks)
+    queue.start()
+    queue.submit("b", "c1")
+    assert holding.wait(5)
+
+    old = queue.submit("a", "old")
+    while old.status != "running":  # Worker picks it up and blocks on the cluster lock
+        threading.Event().wait(0.01)
+    threading.Event().wait(0.05)
+    queue.submit("a", "new")
+    release.set()
+    assert queue.wait_idle(timeout=5)
+    queue.stop()
+
+    assert old.status == "cancelled"
+    assert deployed == ["b@c1", "a@new"]
+
+
+def test_drain_spool_skips_non_object_requests(tmp_path):
+    (tmp_path / "1-bad.json").write_text("[]")
+    (tmp_path / "2-good.json").write_text('{"service": "web", "commit": "c1"}')
+    queue = PipelineQueue([], workers=1, locks=ResourceLocks(lock_dir=None))
+
+    assert drain_spool(queue, str(tmp_path)) == 1
+    assert list(tmp_path.iterdir()) == []
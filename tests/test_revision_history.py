@@ -0,0 +1,124 @@
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "agents"))
+
+from revision_history import (FakeCluster, KubectlCluster, RevisionHistory, pin_image, record_current, revert,
+                              rollback, run_benchmark)
+
+MANIFEST = "spec:\n  containers:\n  - name: app\n    image: app:latest\n"
+
+
+def test_history_keeps_last_n_revisions(tmp_path):
+    history = RevisionHistory(root=str(tmp_path), keep=3)
+    for i in range(5):
+        history.record(MANIFEST, f"app@sha256:{i}")
+    history.record(MANIFEST, "app@sha256:4")  # Re-recording the latest is a no-op
+
+    assert [r["revision"] for r in history.revisions()] == [3, 4, 5]
+    assert sorted(os.listdir(tmp_path)) == ["index.json", "rev-3.yaml", "rev-4.yaml", "rev-5.yaml"]
+    assert "image: app@sha256:4" in history.manifest(history.revisions()[-1])
+    assert history.latest()["image"] == "app@sha256:4"
+
+
+def test_revert_switches_in_place_without_downtime(tmp_path):
+    history = RevisionHistory(root=str(tmp_path))
+    cluster = FakeCluster(replicas=2, startup_seconds=5.0)
+    cluster.apply(pin_image(MANIFEST, "app@sha256:good"))
+    cluster.wait_ready()
+    history.record(MANIFEST, *cluster.pin_revision(cluster.current_image()))
+    cluster.apply(pin_image(MANIFEST, "app@sha256:bad"))
+    cluster.wait_ready()
+
+    start = cluster.now
+    assert revert(history, cluster)
+    assert cluster.current_image() == "app@sha256:good"
+    assert cluster.downtime(start, cluster.now) == 0
+
+
+def test_revert_is_a_noop_when_already_on_latest_known_good(tmp_path):
+    history = RevisionHistory(root=str(tmp_path))
+    cluster = FakeCluster()
+    for image in ("app@sha256:g1", "app@sha256:g2"):
+        cluster.apply(pin_image(MANIFEST, image))
+        cluster.wait_ready()
+        history.record(MANIFEST, *cluster.pin_revision(cluster.current_image()))
+
+    assert revert(history, cluster)
+    assert cluster.current_image() == "app@sha256:g2"
+    assert len(cluster.pods) == 4  # No new rollout was started
+
+
+def test_local_latest_image_is_pinned_per_build(tmp_path):
+    class LocalDockerCluster(KubectlCluster):
+        def __init__(self, image_ids):
+            super().__init__()
+            self.image_ids = image_ids
+
+        def current_image(self):
+            return "flask-webapp1:latest"
+
+        def _docker(self, args):
+            if args[0] == "tag":
+                return "", 0
+            return self.image_ids.get(args[-1], ""), 0
+
+    manifest = tmp_path / "deployment.yaml"
+    manifest.write_text(MANIFEST.replace("app:latest", "flask-webapp1:latest"))
+    history = RevisionHistory(root=str(tmp_path / "revisions"))
+
+    first = record_current(history, LocalDockerCluster({"flask-webapp1:latest": "sha256:aaaaaaaaaaaa11"}), str(manifest))
+    second = record_current(history, LocalDockerCluster({"flask-webapp1:latest": "sha256:bbbbbbbbbbbb22"}), str(manifest))
+
+    assert (first["revision"], first["image"]) == (1, "flask-webapp1:rev-aaaaaaaaaaaa")
+    assert (second["revision"], second["image"]) == (2, "flask-webapp1:rev-bbbbbbbbbbbb")
+    assert "image: flask-webapp1:rev-bbbbbbbbbbbb" in history.manifest(second)
+
+    # Deployment still says :latest, but it resolves to the newest known-good build
+    cluster = LocalDockerCluster({"flask-webapp1:latest": "sha256:bbbbbbbbbbbb22"})
+    assert revert(history, cluster)
+
+
+def test_revert_without_any_revision_fails(tmp_path):
+    cluster = FakeCluster()
+    cluster.apply(MANIFEST)
+    assert not revert(RevisionHistory(root=str(tmp_path)), cluster)
+
+
+def test_benchmark_in_place_beats_delete_and_redeploy():
+    results = run_benchmark(replicas=2, startup_seconds=10.0, teardown_seconds=3.0)
+    assert results["in-place revert"]["downtime"] == 0
+    assert results["delete-and-redeploy"]["downtime"] > 10.0
+    assert results["in-place revert"]["ttr"] < results["delete-and-redeploy"]["ttr"]
+
+
+def test_pruned_revisions_release_their_image_tags(tmp_path):
+    history = RevisionHistory(root=str(tmp_path), keep=2)
+    cluster = FakeCluster()
+    for i in range(4):
+        history.record(MANIFEST, f"app:rev-{i}", on_prune=cluster.release_revision)
+
+    assert cluster.released == ["app:rev-0", "app:rev-1"]
+
+
+def test_rollback_falls_back_to_rollout_undo(tmp_path):
+    cluster = FakeCluster()
+    cluster.apply(pin_image(MANIFEST, "app@sha256:good"))
+    cluster.wait_ready()
+    cluster.apply(pin_image(MANIFEST, "app@sha256:bad"))
+    cluster.wait_ready()
+    history = RevisionHistory(root=str(tmp_path))  # Nothing recorded, so the revert itself fails
+
+    assert not rollback(history, cluster)
+    assert rollback(history, cluster, fallback_undo=True)
+    assert cluster.current_image() == "app@sha256:good"
+
+
+def test_rollback_script_exits_non_zero_on_failure():
+    script = os.path.join(os.path.dirname(__file__), "..", "scripts", "rollback.sh")
+    result = subprocess.run(["bash", script], capture_output=True, text=True,
+                            env=dict(os.environ, PYTHON="false"))
+
+    assert result.returncode != 0
+    assert "Rollback completed!" not in result.stdout